@@ -1,10 +1,16 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
-from math import radians, sin, cos, asin, sqrt
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from math import radians
 
 CATEGORY_ORDER = ["OC", "BC", "MBC", "SC", "ST"]
 
+# score components, in the column order of the score block (keys match Weights fields)
+COMPONENT_KEYS = ["affordability", "proximity", "placements", "quality", "rural_support", "hostel", "branch_priority"]
+BUDGET_NOTE = "Budget slightly above limit: applied 10% penalty."
+OWNERSHIP_RANK = {"Government": 3, "Government-Aided": 2, "Private": 1}
+
 # rough district centroid lat/long (synthetic small set for demo)
 DISTRICT_COORDS = {
     "Chennai": (13.0827, 80.2707),
@@ -18,159 +24,219 @@ DISTRICT_COORDS = {
     "Thanjavur": (10.7867, 79.1378),
 }
 
-def haversine_km(lat1, lon1, lat2, lon2):
+DISTRICT_COORDS_RAD = {k: (radians(lat), radians(lon)) for k, (lat, lon) in DISTRICT_COORDS.items()}
+
+def haversine_km_rad(lat1, lon1, lat2, lon2):
+    # Inputs already in radians; works elementwise on ndarrays
     # Earth radius in km
     R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1))*cos(radians(lat2))*sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
     return R * c
 
+def haversine_km(lat1, lon1, lat2, lon2):
+    return float(haversine_km_rad(radians(lat1), radians(lon1), radians(lat2), radians(lon2)))
+
+# district centroids in radians, addressed by position for vectorized distance
+DIST_INDEX = {name: i for i, name in enumerate(DISTRICT_COORDS)}
+_DIST_LATS_RAD = np.array([lat for lat, _ in DISTRICT_COORDS_RAD.values()])
+_DIST_LONS_RAD = np.array([lon for _, lon in DISTRICT_COORDS_RAD.values()])
+
+# pairwise district distances (km), so the request path never evaluates trig
+DIST_MATRIX = haversine_km_rad(
+    _DIST_LATS_RAD[:, None], _DIST_LONS_RAD[:, None], _DIST_LATS_RAD[None, :], _DIST_LONS_RAD[None, :]
+)
+
+# DIST_MATRIX padded with a fallback row/column at index -1, so unknown districts need no branch
+_DIST_LOOKUP = np.full((len(DIST_INDEX) + 1, len(DIST_INDEX) + 1), 150.0)
+_DIST_LOOKUP[:-1, :-1] = DIST_MATRIX
+
 def distance_between_districts(d1: str, d2: str) -> float:
-    if d1 not in DISTRICT_COORDS or d2 not in DISTRICT_COORDS:
-        return 150.0  # fallback
-    (a_lat, a_lon) = DISTRICT_COORDS[d1]
-    (b_lat, b_lon) = DISTRICT_COORDS[d2]
-    return haversine_km(a_lat, a_lon, b_lat, b_lon)
-
-def normalize_series(s: pd.Series) -> pd.Series:
-    if s.empty:
-        return s
-    min_v, max_v = s.min(), s.max()
-    if max_v - min_v == 0:
-        return pd.Series([0.5]*len(s), index=s.index)
-    return (s - min_v) / (max_v - min_v)
+    return float(_DIST_LOOKUP[DIST_INDEX.get(d1, -1), DIST_INDEX.get(d2, -1)])
+
+def distances_from_district(district: str, idx: np.ndarray) -> np.ndarray:
+    # idx holds DIST_INDEX positions, -1 (the fallback slot) for unknown districts
+    return _DIST_LOOKUP[DIST_INDEX.get(district, -1), idx]
 
 def load_data(data_dir: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     colleges = pd.read_csv(f"{data_dir}/colleges.csv")
     programs = pd.read_csv(f"{data_dir}/programs.csv")
     cutoffs = pd.read_csv(f"{data_dir}/cutoffs.csv")
+    # Integer-valued columns fit narrower dtypes exactly; rates and cutoffs stay float64
+    colleges[["hostel_available", "rural_support"]] = colleges[["hostel_available", "rural_support"]].astype(np.uint8)
+    colleges["avg_fee"] = colleges["avg_fee"].astype(np.int32)
+    programs[["annual_fee", "seats"]] = programs[["annual_fee", "seats"]].astype(np.int32)
+    # Shared categorical join keys, so merges hash small integer codes instead of strings
+    code_dtype = pd.CategoricalDtype(sorted(set(colleges.college_code) | set(programs.college_code) | set(cutoffs.college_code)))
+    branch_dtype = pd.CategoricalDtype(sorted(set(programs.branch) | set(cutoffs.branch)))
+    for df in (colleges, programs, cutoffs):
+        df["college_code"] = df["college_code"].astype(code_dtype)
+    for df in (programs, cutoffs):
+        df["branch"] = df["branch"].astype(branch_dtype)
+    # Upper-cased once here so preferred-branch matching is a code lookup per request
+    programs["branch_upper"] = programs["branch"].str.upper().astype("category")
     return colleges, programs, cutoffs
 
-def get_required_cutoff(cutoffs_df: pd.DataFrame, college_code: str, branch: str, category: str) -> float:
-    row = cutoffs_df[(cutoffs_df.college_code==college_code) & (cutoffs_df.branch==branch)]
-    if row.empty:
-        # conservative: require higher cutoff if unknown
-        return 180.0
-    # pick category column or fallback to OC
-    cat_col = category if category in row.columns else "OC"
-    return float(row.iloc[0][cat_col])
-
-def score_row(row, weights) -> Tuple[float, Dict[str, float], List[str]]:
-    components = {
-        "affordability": row["affordability_norm"],
-        "proximity": row["proximity_norm"],
-        "placements": row["placement_rate_norm"],
-        "quality": row["quality_score_norm"],
-        "rural_support": row["rural_support_norm"],
-        "hostel": row["hostel_norm"],
-        "branch_priority": row["branch_priority_norm"],
-    }
-    total = sum(getattr(weights, k) * components[k] for k in components.keys())
-    notes = []
-    if row.get("budget_stretch", 0) > 0:
-        total *= 0.9
-        notes.append("Budget slightly above limit: applied 10% penalty.")
-    return total, components, notes
-
-def recommend(profile, weights, colleges, programs, cutoffs) -> List[Dict]:
-    # Merge programs with college info
-    df = programs.merge(colleges, on="college_code", how="left", suffixes=("_prog",""))
-    # Eligibility filter by cutoff
-    def eligible(rec):
-        req = get_required_cutoff(cutoffs, rec["college_code"], rec["branch"], profile.category)
-        return profile.cutoff >= req, req
-    elig_list, req_list = [], []
-    for _, r in df.iterrows():
-        ok, req = eligible(r)
-        elig_list.append(ok)
-        req_list.append(req)
-    df["eligible"] = elig_list
-    df["required_cutoff"] = req_list
-    df = df[df["eligible"]]
-
-    if df.empty:
+@dataclass
+class ProgramTable:
+    # Struct-of-arrays view of the merged programs x colleges catalogue, one entry per program
+    college_code: np.ndarray
+    college_name: np.ndarray
+    district: np.ndarray
+    ownership: np.ndarray
+    branch: np.ndarray
+    branch_code: np.ndarray
+    annual_fee: np.ndarray
+    placement_rate: np.ndarray
+    quality_score: np.ndarray
+    hostel_ok: np.ndarray
+    rural_support: np.ndarray
+    district_idx: np.ndarray
+    ownership_rank: np.ndarray
+    # category -> required cutoff per program
+    required_cutoff: Dict[str, np.ndarray] = field(default_factory=dict)
+    # upper-cased branch name -> branch_code
+    branch_codes: Dict[str, int] = field(default_factory=dict)
+
+def precompute(colleges: pd.DataFrame, programs: pd.DataFrame, cutoffs: pd.DataFrame) -> ProgramTable:
+    # Merge programs with college info once; per-request work only filters and scores
+    merged = programs.merge(colleges, on="college_code", how="left", suffixes=("_prog",""))
+
+    # Required cutoff per category, aligned to merged rows; first row wins on duplicate keys
+    keys = merged[["college_code", "branch"]].merge(
+        cutoffs.drop_duplicates(["college_code", "branch"]), on=["college_code", "branch"], how="left"
+    )
+    categories = [c for c in cutoffs.columns if c not in ("college_code", "branch")]
+    # conservative: require higher cutoff if unknown
+    required = {c: keys[c].fillna(180.0).to_numpy(dtype=float) for c in categories}
+
+    return ProgramTable(
+        college_code=merged["college_code"].to_numpy(),
+        college_name=merged["college_name"].to_numpy(),
+        district=merged["district"].to_numpy(),
+        ownership=merged["ownership"].to_numpy(),
+        branch=merged["branch"].to_numpy(),
+        branch_code=merged["branch_upper"].cat.codes.to_numpy(),
+        annual_fee=merged["annual_fee"].to_numpy(),
+        placement_rate=merged["placement_rate"].to_numpy(dtype=float),
+        quality_score=merged["quality_score"].to_numpy(dtype=float),
+        hostel_ok=merged["hostel_available"].to_numpy(dtype=np.uint8),
+        # Rural/first-gen boost as a metric (not a hard filter)
+        rural_support=merged["rural_support"].to_numpy(dtype=np.uint8),
+        district_idx=merged["district"].map(DIST_INDEX).fillna(-1).to_numpy(dtype=int),
+        ownership_rank=merged["ownership"].map(OWNERSHIP_RANK).fillna(0).to_numpy(dtype=int),
+        required_cutoff=required,
+        branch_codes={b: i for i, b in enumerate(merged["branch_upper"].cat.categories)},
+    )
+
+def weight_vector(weights) -> np.ndarray:
+    return np.array([getattr(weights, k) for k in COMPONENT_KEYS], dtype=float)
+
+def score_kernel(raw: np.ndarray, w: np.ndarray, penalty: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Min-max normalizes every column of the (N, 7) block in place, then weights and penalizes it
+    lo = raw.min(axis=0)
+    rng = raw.max(axis=0) - lo
+    flat = rng == 0
+    rng[flat] = 1.0
+    raw -= lo
+    raw /= rng
+    raw[:, flat] = 0.5
+    # Accumulate column by column rather than raw @ w: BLAS may round identical rows
+    # differently, which would break exact total_score ties the tie-breakers rely on
+    totals = np.zeros(len(raw))
+    for j in range(raw.shape[1]):
+        totals += raw[:, j] * w[j]
+    return raw, totals * penalty
+
+def top_k_candidates(totals: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+    # Rows scoring at least the k-th best total; ties are kept so tie-breakers still decide
+    n = len(totals)
+    if top_k is None or top_k >= n:
+        return np.ones(n, dtype=bool)
+    kth = np.partition(totals, n - top_k)[n - top_k]
+    return totals >= kth
+
+def recommend(profile, weights, colleges, programs, cutoffs, top_k: Optional[int] = None) -> List[Dict]:
+    return recommend_fast(profile, weight_vector(weights), precompute(colleges, programs, cutoffs), top_k)
+
+def recommend_fast(profile, w: np.ndarray, table: ProgramTable, top_k: Optional[int] = None) -> List[Dict]:
+    # w is weight_vector(weights), built once by the caller
+    # Eligibility filter by cutoff; pick category column or fallback to OC
+    required = table.required_cutoff.get(profile.category, table.required_cutoff["OC"])
+    mask = profile.cutoff >= required
+    # Hostel need
+    if profile.need_hostel:
+        mask &= table.hostel_ok == 1
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
         return []
 
-    # Budget
-    df["budget_ok"] = df["annual_fee"] <= profile.budget
-    df["budget_stretch"] = (~df["budget_ok"]).astype(int)
+    # Budget slightly above limit: 10% penalty, applied as a multiplier
+    fees = table.annual_fee[rows]
+    budget_stretch = fees > profile.budget
+    penalty = np.where(budget_stretch, 0.9, 1.0)
 
     # Distance
-    df["distance_km"] = df.apply(lambda r: distance_between_districts(profile.district, r["district"]), axis=1)
+    distance_km = distances_from_district(profile.district, table.district_idx[rows])
 
     # Preferred branches
     preferred = set([b.strip().upper() for b in profile.preferred_branches]) if profile.preferred_branches else set()
-    df["branch_priority"] = df["branch"].str.upper().apply(lambda b: 1.0 if b in preferred else 0.5 if len(preferred)>0 else 0.7)
-
-    # Hostel need
-    df["hostel_ok"] = df["hostel_available"].astype(int)
-    if profile.need_hostel:
-        df = df[df["hostel_ok"] == 1]
-        if df.empty:
-            return []
-
-    # Rural/first-gen boost as a metric (not a hard filter)
-    df["rural_support_score"] = df["rural_support"].astype(int)
-
-    # Normalize metrics
-    # Affordability: lower fee is better => invert before normalize
-    df["affordability"] = -df["annual_fee"]
-    df["affordability_norm"] = normalize_series(df["affordability"])
-
-    # Proximity: lower distance is better => invert
-    df["proximity"] = -df["distance_km"]
-    df["proximity_norm"] = normalize_series(df["proximity"])
-
-    df["placement_rate_norm"] = normalize_series(df["placement_rate"])
-    df["quality_score_norm"] = normalize_series(df["quality_score"])
-    df["rural_support_norm"] = normalize_series(df["rural_support_score"])
-    df["hostel_norm"] = normalize_series(df["hostel_ok"])
-    df["branch_priority_norm"] = normalize_series(df["branch_priority"])
+    if preferred:
+        codes = [table.branch_codes[b] for b in preferred if b in table.branch_codes]
+        branch_priority = np.where(np.isin(table.branch_code[rows], codes), 1.0, 0.5)
+    else:
+        branch_priority = np.full(len(rows), 0.7)
 
     # Compute eligibility margin
-    df["eligibility_margin"] = profile.cutoff - df["required_cutoff"]
-
-    # Score
-    totals, comps, notes_list = [], [], []
-    for _, r in df.iterrows():
-        total, components, notes = score_row(r, weights)
-        totals.append(total)
-        comps.append(components)
-        notes_list.append(notes)
-    df["total_score"] = totals
-    df["components"] = comps
-    df["notes"] = notes_list
-
-    # Tie-breakers: total_score desc, eligibility_margin desc, ownership pref (Govt > Govt-Aided > Private), proximity asc
-    ownership_rank = {"Government": 3, "Government-Aided": 2, "Private": 1}
-    df["ownership_rank"] = df["ownership"].map(ownership_rank).fillna(0)
+    margin = profile.cutoff - required[rows]
 
-    df = df.sort_values(
-        by=["total_score", "eligibility_margin", "ownership_rank", "proximity"],
-        ascending=[False, False, False, False]
-    )
+    # Normalize metrics and score; lower fee and distance are better => invert
+    raw = np.column_stack([
+        -fees, -distance_km, table.placement_rate[rows], table.quality_score[rows],
+        table.rural_support[rows], table.hostel_ok[rows], branch_priority,
+    ]).astype(np.float64)
+    norms, totals = score_kernel(raw, w, penalty)
 
-    # Build output
-    out = []
-    for i, r in enumerate(df.itertuples(), start=1):
-        out.append({
-            "rank": i,
-            "college_code": r.college_code,
-            "college_name": r.college_name,
-            "district": r.district,
-            "ownership": r.ownership,
-            "program": r.branch,
-            "annual_fee": int(r.annual_fee),
-            "placement_rate": float(r.placement_rate),
-            "quality_score": float(r.quality_score),
-            "distance_km": float(r.distance_km),
-            "eligibility_margin": float(r.eligibility_margin),
-            "total_score": float(r.total_score),
+    # Tie-breakers: total_score desc, eligibility_margin desc, ownership pref (Govt > Govt-Aided > Private), proximity asc
+    cand = np.flatnonzero(top_k_candidates(totals, top_k))
+    ranks = table.ownership_rank[rows[cand]]
+    order = cand[np.lexsort((distance_km[cand], -ranks, -margin[cand], -totals[cand]))][:top_k]
+
+    # Build output from the k selected rows only
+    sel = rows[order]
+    codes = table.college_code[sel].tolist()
+    names = table.college_name[sel].tolist()
+    districts = table.district[sel].tolist()
+    ownerships = table.ownership[sel].tolist()
+    branches = table.branch[sel].tolist()
+    fee_list = fees[order].tolist()
+    plac = table.placement_rate[sel].tolist()
+    qual = table.quality_score[sel].tolist()
+    dists = distance_km[order].tolist()
+    margins = margin[order].tolist()
+    scores = totals[order].tolist()
+    stretched = budget_stretch[order]
+    comps = norms[order].tolist()
+    return [
+        {
+            "rank": i + 1,
+            "college_code": codes[i],
+            "college_name": names[i],
+            "district": districts[i],
+            "ownership": ownerships[i],
+            "program": branches[i],
+            "annual_fee": fee_list[i],
+            "placement_rate": plac[i],
+            "quality_score": qual[i],
+            "distance_km": dists[i],
+            "eligibility_margin": margins[i],
+            "total_score": scores[i],
             "explanation": {
-                "components": r.components,
-                "notes": r.notes,
+                "components": dict(zip(COMPONENT_KEYS, comps[i])),
+                "notes": [BUDGET_NOTE] if stretched[i] else [],
             }
-        })
-    return out
+        }
+        for i in range(len(codes))
+    ]
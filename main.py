@@ -1,10 +1,13 @@
+from functools import lru_cache
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+import numpy as np
+import orjson
 import pandas as pd
 from typing import List
-from models import RecommendationRequest, OptionsResponse, Weights
-from algorithm import load_data, recommend
+from models import RecommendationRequest, OptionsResponse, StudentProfile, Weights
+from algorithm import load_data, precompute, recommend_fast, weight_vector
 
 DATA_DIR = "data"
 
@@ -19,6 +22,14 @@ app.add_middleware(
 )
 
 colleges_df, programs_df, cutoffs_df = load_data(DATA_DIR)
+PRECOMP = precompute(colleges_df, programs_df, cutoffs_df)
+DEFAULT_WEIGHTS = tuple(weight_vector(Weights()).tolist())
+
+# Run the request path once so the first real request doesn't pay one-time setup costs
+recommend_fast(
+    StudentProfile(cutoff=200, category="OC", preferred_branches=["CSE"], district="Chennai", budget=0, need_hostel=True),
+    np.array(DEFAULT_WEIGHTS), PRECOMP, top_k=1,
+)
 
 
 @app.get("/")
@@ -40,8 +51,22 @@ def get_options():
         default_weights=Weights()
     )
 
+@lru_cache(maxsize=4096)
+def cached_recommendations(cutoff, category, preferred, district, budget, need_hostel, weights, top_k) -> bytes:
+    # Keyed on every profile field recommend_fast() reads; call cache_clear() if PRECOMP is rebuilt
+    profile = StudentProfile(
+        cutoff=cutoff, category=category, preferred_branches=list(preferred),
+        district=district, budget=budget, need_hostel=need_hostel,
+    )
+    results = recommend_fast(profile, np.array(weights), PRECOMP, top_k)
+    return orjson.dumps(results)
+
 @app.post("/api/recommendations")
 def recommendations(req: RecommendationRequest):
-    weights = req.weights or Weights()
-    results = recommend(req.profile, weights, colleges_df, programs_df, cutoffs_df)
-    return JSONResponse(results)
+    p = req.profile
+    weights = tuple(weight_vector(req.weights).tolist()) if req.weights else DEFAULT_WEIGHTS
+    preferred = tuple(sorted({b.strip().upper() for b in p.preferred_branches}))
+    content = cached_recommendations(
+        p.cutoff, p.category, preferred, p.district, p.budget, p.need_hostel, weights, req.top_k
+    )
+    return Response(content=content, media_type="application/json")
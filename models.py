@@ -24,7 +24,7 @@ class Weights(BaseModel):
 class RecommendationRequest(BaseModel):
     profile: StudentProfile
     weights: Optional[Weights] = None
-    top_k: int = 20
+    top_k: int = Field(20, ge=1)
 
 class Explanation(BaseModel):
     components: Dict[str, float]
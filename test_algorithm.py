@@ -0,0 +1,50 @@
+import pandas as pd
+
+from algorithm import load_data, precompute, recommend_fast, weight_vector
+from models import StudentProfile, Weights
+
+
+def write_catalogue(data_dir, n_filler=17):
+    # Filler colleges spread the tied pair across a realistically sized score block
+    districts = ["Chennai", "Coimbatore", "Madurai", "Salem", "Erode", "Vellore"]
+    colleges, programs, cutoffs = [], [], []
+    for i in range(n_filler):
+        code = f"TN{100 + i}"
+        colleges.append({
+            "college_code": code, "college_name": f"College {i}", "district": districts[i % len(districts)],
+            "ownership": ["Government", "Government-Aided", "Private"][i % 3],
+            "hostel_available": i % 2, "rural_support": (i + 1) % 2,
+            "placement_rate": 0.6 + 0.017 * i, "quality_score": 0.9 - 0.013 * i, "avg_fee": 40000 + 3100 * i,
+        })
+        programs.append({"college_code": code, "branch": "MECH", "annual_fee": 40000 + 3100 * i, "seats": 60})
+        cutoffs.append({"college_code": code, "branch": "MECH", "OC": 170 + i, "BC": 168, "MBC": 166, "SC": 160, "ST": 158})
+    # Same college and fee for both branches, so every score component is identical
+    colleges.append({
+        "college_code": "TN900", "college_name": "Tied College", "district": "Erode", "ownership": "Private",
+        "hostel_available": 1, "rural_support": 1, "placement_rate": 0.77, "quality_score": 0.83, "avg_fee": 73000,
+    })
+    for branch, oc in [("CSE", 189), ("ECE", 186)]:
+        programs.append({"college_code": "TN900", "branch": branch, "annual_fee": 73000, "seats": 60})
+        cutoffs.append({"college_code": "TN900", "branch": branch, "OC": oc, "BC": 180, "MBC": 178, "SC": 172, "ST": 170})
+    pd.DataFrame(colleges).to_csv(data_dir / "colleges.csv", index=False)
+    pd.DataFrame(programs).to_csv(data_dir / "programs.csv", index=False)
+    pd.DataFrame(cutoffs).to_csv(data_dir / "cutoffs.csv", index=False)
+
+
+def test_identical_components_tie_and_fall_back_to_eligibility_margin(tmp_path):
+    write_catalogue(tmp_path)
+    table = precompute(*load_data(str(tmp_path)))
+    profile = StudentProfile(
+        cutoff=193, category="OC", preferred_branches=["CSE", "ECE"], district="Coimbatore", budget=85000,
+    )
+    weight_sets = [Weights()] + [
+        Weights(affordability=a, proximity=p, placements=0.3, quality=0.17, rural_support=0.11, hostel=0.07, branch_priority=b)
+        for a in (0.05, 0.13, 0.29) for p in (0.02, 0.21, 0.37) for b in (0.03, 0.19)
+    ]
+    for weights in weight_sets:
+        out = recommend_fast(profile, weight_vector(weights), table)
+        tied = [r for r in out if r["college_code"] == "TN900"]
+        assert [r["program"] for r in tied] == ["ECE", "CSE"]
+        assert tied[0]["explanation"]["components"] == tied[1]["explanation"]["components"]
+        assert tied[0]["total_score"] == tied[1]["total_score"]
+        assert tied[1]["rank"] == tied[0]["rank"] + 1